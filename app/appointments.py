@@ -1,3 +1,4 @@
+import re
 from fastapi import HTTPException
 from mongodb import appointments_collection, users_collection
 
@@ -61,3 +62,44 @@ def create_appointment(user_id: str, appointment_date: str, start_time: str, end
         "start_time": start_time,
         "end_time": end_time
     })
+
+
+
+# Whole words about booking, and the assistant's confirm prompt before a booking
+BOOKING_REQUEST_PATTERN = re.compile(r"\b(appointments?|book|booking|schedule|reschedule|reserve)\b", re.IGNORECASE)
+BOOKING_CONFIRM_PATTERN = re.compile(r"\b(confirm|confirmation)\b", re.IGNORECASE)
+
+# A date or time mentioned in a message, such as 2024-05-01, 10:30, 10 am, 10 o'clock, tomorrow or Monday
+DATE_TIME_PATTERN = re.compile(
+    r"\b(\d{4}-\d{2}-\d{2}|\d{1,2}:\d{2}|\d{1,2}\s*(am|pm|o'clock)|today|tomorrow"
+    r"|monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+    r"|january|february|march|april|june|july|august|september|october|november|december"
+    # "may" is also a common verb, so it only counts next to a day number
+    r"|\d{1,2}(st|nd|rd|th)?\s+(of\s+)?may|may\s+\d{1,2})\b",
+    re.IGNORECASE
+)
+
+
+def is_booking_in_progress(messages: list) -> bool:
+    """
+    Check if the conversation is about to confirm an appointment booking.
+
+    The booking details are only returned after the user confirms them, so only
+    the assistant's confirm prompt counts, not the turn where the user asks to book.
+    
+    Args:
+        messages (list): The chat history messages of the user.
+
+    Returns:
+        bool: True if the last assistant reply asks to confirm a booking or its date or time, False otherwise.
+    """
+    
+    for message in reversed(messages):
+        if message["role"] == "assistant":
+            reply = message["content"]
+            return bool(
+                BOOKING_CONFIRM_PATTERN.search(reply)
+                and (BOOKING_REQUEST_PATTERN.search(reply) or DATE_TIME_PATTERN.search(reply))
+            )
+    
+    return False
@@ -0,0 +1,91 @@
+"""
+Compare latency and throughput of the translator backends.
+
+Usage (from the app folder):
+    python benchmark_translator.py --backends google local --rounds 20
+"""
+import argparse
+import statistics
+import time
+
+from translator import create_translator_backend
+
+# Sample receptionist queries in each supported language
+SAMPLE_QUERIES = {
+    'hi': [
+        "मुझे कल सुबह दस बजे वेब डेवलपमेंट के लिए अपॉइंटमेंट चाहिए।",
+        "आपके ऑफिस का समय क्या है?",
+        "ऐप डेवलपमेंट की कीमत कितनी है?",
+        "क्या मैं अपनी अपॉइंटमेंट बदल सकता हूँ?",
+    ],
+    'gu': [
+        "મને કાલે સવારે દસ વાગ્યે વેબ ડેવલપમેન્ટ માટે એપોઇન્ટમેન્ટ જોઈએ છે.",
+        "તમારી ઓફિસનો સમય શું છે?",
+        "એપ ડેવલપમેન્ટની કિંમત કેટલી છે?",
+        "શું હું મારી એપોઇન્ટમેન્ટ બદલી શકું?",
+    ],
+}
+
+
+def benchmark_backend(backend_name: str, rounds: int):
+    """
+    Measure detection latency, per-turn translation latency and batch throughput for one backend.
+    """
+    backend = create_translator_backend(backend_name)
+    try:
+        # Warm up every worker and the connection so model loading or connection setup is not measured
+        backend.warm_up()
+        backend.translate(SAMPLE_QUERIES['hi'][0], 'hi', 'en')
+
+        detect_times = []
+        turn_times = []
+        for _ in range(rounds):
+            for language, queries in SAMPLE_QUERIES.items():
+                for query in queries:
+                    start = time.perf_counter()
+                    backend.detect(query)
+                    detect_times.append(time.perf_counter() - start)
+
+                    # A non-English turn translates the query in and the answer back out
+                    start = time.perf_counter()
+                    english = backend.translate(query, language, 'en')
+                    backend.translate(english, 'en', language)
+                    turn_times.append(time.perf_counter() - start)
+
+        batch = [query for _ in range(rounds) for query in SAMPLE_QUERIES['hi']]
+        start = time.perf_counter()
+        backend.translate_batch(batch, 'hi', 'en')
+        batch_seconds = time.perf_counter() - start
+    finally:
+        backend.close()
+
+    return {
+        "detect_p50_ms": statistics.median(detect_times) * 1000,
+        "turn_p50_ms": statistics.median(turn_times) * 1000,
+        "turn_p95_ms": statistics.quantiles(turn_times, n=20)[-1] * 1000,
+        "batch_texts_per_s": len(batch) / batch_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark translator backends.")
+    parser.add_argument("--backends", nargs="+", default=["google", "local"])
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    if args.rounds < 1:
+        parser.error("--rounds must be at least 1")
+
+    print(f"{'backend':<10}{'detect p50 ms':>15}{'turn p50 ms':>14}{'turn p95 ms':>14}{'batch texts/s':>16}")
+    for backend_name in args.backends:
+        results = benchmark_backend(backend_name, args.rounds)
+        print(
+            f"{backend_name:<10}"
+            f"{results['detect_p50_ms']:>15.2f}"
+            f"{results['turn_p50_ms']:>14.1f}"
+            f"{results['turn_p95_ms']:>14.1f}"
+            f"{results['batch_texts_per_s']:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
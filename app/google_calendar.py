@@ -1,6 +1,7 @@
 import datetime
 import os
 import pickle
+import threading
 import pytz
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -10,6 +11,9 @@ CALANDER_CREDENTIALS_PATH= os.getenv("CALANDER_CREDENTIALS_PATH")
 # Define the required Google Calendar API scopes
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+# Serialises access to 'token.pickle' between request threads
+token_lock = threading.Lock()
+
 def authenticate_google_calendar():
     """
     Authenticate and return the Google Calendar service.
@@ -23,31 +27,56 @@ def authenticate_google_calendar():
         service (Resource): The authenticated Google Calendar API service.
     """
     
-    creds = None
-    
-    # Check if token.pickle exists and load credentials from it
-    if os.path.exists('token.pickle'):
-        with open('token.pickle', 'rb') as token:
-            creds = pickle.load(token)
-    
-    # If no credentials are found or they are invalid, authenticate again
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            # Refresh expired credentials
-            creds.refresh(Request())
-        else:
-            # Prompt the user for authentication if no valid token is found
-            flow = InstalledAppFlow.from_client_secrets_file(CALANDER_CREDENTIALS_PATH, SCOPES)
-            creds = flow.run_local_server(port=0)
+    with token_lock:
+        creds = load_calendar_credentials()
         
-        # Save the credentials for future use in 'token.pickle'
-        with open('token.pickle', 'wb') as token:
-            pickle.dump(creds, token)
+        # If no credentials are found or they are invalid, authenticate again
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                # Refresh expired credentials
+                creds.refresh(Request())
+            else:
+                # Prompt the user for authentication if no valid token is found
+                flow = InstalledAppFlow.from_client_secrets_file(CALANDER_CREDENTIALS_PATH, SCOPES)
+                creds = flow.run_local_server(port=0)
+            
+            # Save the credentials for future use in 'token.pickle'
+            with open('token.pickle', 'wb') as token:
+                pickle.dump(creds, token)
     
     # Return the authenticated Google Calendar API service
     return build('calendar', 'v3', credentials=creds)
 
 
+def load_calendar_credentials():
+    """
+    Load the saved Google Calendar credentials from 'token.pickle'.
+    
+    Returns:
+        Credentials: The saved credentials, or None if no token has been saved.
+    """
+    
+    if not os.path.exists('token.pickle'):
+        return None
+    
+    with open('token.pickle', 'rb') as token:
+        return pickle.load(token)
+
+
+def calendar_token_available():
+    """
+    Check if the calendar can be authenticated without the interactive browser flow.
+    
+    Returns:
+        bool: True if the saved credentials are valid or can be refreshed, False otherwise.
+    """
+    
+    with token_lock:
+        creds = load_calendar_credentials()
+    
+    return bool(creds and (creds.valid or (creds.expired and creds.refresh_token)))
+
+
 def convert_ist_to_utc(ist_time_str, date):
     """
     Convert IST (Indian Standard Time) datetime to UTC (Coordinated Universal Time).
@@ -141,3 +170,81 @@ def schedule_meeting(service, user_name, user_email, service_name, date, time_is
     
     # Return the link to the scheduled event
     return event.get('htmlLink')
+
+
+def list_upcoming_meetings(service, days=14):
+    """
+    Fetch all meetings from now until the given number of days ahead.
+
+    Args:
+        service (Resource): The authenticated Google Calendar API service.
+        days (int): How many days ahead to fetch meetings for.
+
+    Returns:
+        dict: The fetched window as 'start' and 'end' UTC datetimes and the list of events as 'items'.
+    """
+    
+    # Define the window starting at midnight UTC today
+    window_start = datetime.datetime.now(pytz.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    window_end = window_start + datetime.timedelta(days=days)
+    
+    # Query the Google Calendar API for all events within the window
+    items = []
+    page_token = None
+    while True:
+        events_result = service.events().list(
+            calendarId='primary',
+            timeMin=window_start.isoformat(),
+            timeMax=window_end.isoformat(),
+            singleEvents=True,
+            orderBy='startTime',
+            pageToken=page_token
+        ).execute()
+        items.extend(events_result.get('items', []))
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            break
+    
+    return {'start': window_start, 'end': window_end, 'items': items}
+
+
+def _event_boundary(boundary):
+    """
+    Convert a Google Calendar event start or end into a UTC datetime.
+    """
+    
+    # All-day events only carry a date
+    if 'dateTime' not in boundary:
+        return pytz.utc.localize(datetime.datetime.strptime(boundary['date'], "%Y-%m-%d"))
+    
+    return datetime.datetime.fromisoformat(boundary['dateTime'].replace('Z', '+00:00')).astimezone(pytz.utc)
+
+
+def find_meetings_at(upcoming_meetings, date, time):
+    """
+    Find meetings at the given date and time within meetings fetched by list_upcoming_meetings.
+
+    Uses the same one hour window as check_existing_meetings.
+
+    Args:
+        upcoming_meetings (dict): The result of list_upcoming_meetings.
+        date (str): The date to check for existing meetings (YYYY-MM-DD).
+        time (str): The time to check for existing meetings (HH:MM:SS).
+
+    Returns:
+        list: A list of events found at the specified time, or None if the time is outside the fetched window.
+    """
+    
+    # Define the start and end datetime for the meeting
+    start_datetime = pytz.utc.localize(datetime.datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M:%S"))
+    end_datetime = start_datetime + datetime.timedelta(hours=1)
+    
+    # The caller has to query the API directly for times that were not prefetched
+    if start_datetime < upcoming_meetings['start'] or end_datetime > upcoming_meetings['end']:
+        return None
+    
+    # Keep the events that overlap the meeting window
+    return [
+        event for event in upcoming_meetings['items']
+        if _event_boundary(event['start']) < end_datetime and _event_boundary(event['end']) > start_datetime
+    ]
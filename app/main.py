@@ -10,13 +10,21 @@ from mongodb import (
     custom_responses_collection
 )
 from chat import generate_answer
-from appointments import create_appointment
+from appointments import create_appointment, is_booking_in_progress
 import os
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime, timedelta
 import json
-from google_calendar import authenticate_google_calendar, check_existing_meetings, schedule_meeting
-from translator import convert_language, detected_que_language
+from google_calendar import (
+    authenticate_google_calendar,
+    check_existing_meetings,
+    schedule_meeting,
+    list_upcoming_meetings,
+    find_meetings_at,
+    calendar_token_available
+)
+from translator import convert_language, detected_que_language, get_translator_backend
+from stages import StageTimings
 
 # Initialize FastAPI app
 app = FastAPI()
@@ -40,6 +48,11 @@ app.add_middleware(
 # Insert sample data if empty
 insert_sample_data_if_empty()
 
+@app.on_event("startup")
+def warm_up_translator():
+    """Load the translator backend at startup so the first non-English query does not pay for it."""
+    get_translator_backend().warm_up()
+
 # Pydantic models for request and response validation
 class Service(BaseModel):
     service_name: str
@@ -99,34 +112,110 @@ def get_business_information():
         contact_information=business_data["contact_information"]
     )
 
+def translate_query_to_english(timings: StageTimings, user_question: str):
+    """Detect the query language and translate the query to English if necessary."""
+    detected_language = timings.run("language_detection", detected_que_language, user_question)
+    if detected_language != "en":
+        user_question = timings.run(
+            "translation_in", convert_language,
+            user_query=user_question, current_language=detected_language, dest_language="en"
+        )
+    return detected_language, user_question
+
+def fetch_upcoming_meetings():
+    """Fetch upcoming meetings with a calendar client of its own, as clients are not thread-safe."""
+    return list_upcoming_meetings(authenticate_google_calendar())
+
+def prefetch_calendar_availability(timings: StageTimings):
+    """
+    Speculatively set up the calendar client and fetch upcoming meetings ahead of a likely booking.
+    Returns the two futures, or None for any prefetch that was not started.
+    """
+    # Never start the interactive browser flow from a background thread
+    if not calendar_token_available():
+        return None, None
+
+    calendar_future = timings.speculate("calendar_auth_prefetch", authenticate_google_calendar)
+    meetings_future = timings.speculate("upcoming_meetings_prefetch", fetch_upcoming_meetings)
+    return calendar_future, meetings_future
+
+def get_calendar_service(timings: StageTimings, calendar_future):
+    """Return the prefetched calendar client, or set one up if nothing was prefetched or the prefetch failed."""
+    if calendar_future is not None:
+        try:
+            return calendar_future.result()
+        except Exception as e:
+            print(f"Calendar client prefetch failed: {str(e)}")
+
+    return timings.run("calendar_auth", authenticate_google_calendar)
+
+def get_prefetched_meetings(meetings_future):
+    """Return the prefetched upcoming meetings, or None if nothing was prefetched or the prefetch failed."""
+    if meetings_future is None:
+        return None
+
+    try:
+        return meetings_future.result()
+    except Exception as e:
+        print(f"Upcoming meetings prefetch failed: {str(e)}")
+        return None
+
+def store_user_messages(user_id: str, messages: list, create_history: bool):
+    """Create the user's chat history with the given messages, or append them to the existing history."""
+    if create_history:
+        queries_collection.insert_one({"user_id": user_id, "messages": messages})
+    else:
+        queries_collection.update_one(
+            {"user_id": user_id},
+            {"$push": {"messages": {"$each": messages}}}
+        )
+
 @app.post("/query/", response_model=ChatResponse)
 def process_query(query_data: ChatRequest):
     """
     Process a user's query, fetch previous messages, pass it to OpenAI, and update chat history.
     
     Steps:
-    - Retrieve business data and custom responses.
-    - Detect query language, translate if needed.
+    - Concurrently retrieve business data, custom responses and chat history, and detect query language, translating if needed.
+    - Prefetch calendar availability in the background if a booking is in progress.
     - Process the query and generate response using OpenAI.
     - Handle appointment booking or conflicts.
+
+    Stage timings are printed on every exit, including errors.
     """
     
-    # Retrieve business data and custom responses
-    business_data = business_collection.find_one()
-    custom_responses_documents = custom_responses_collection.find()
+    timings = StageTimings(f"query {query_data.user_id}")
+    try:
+        return answer_query(query_data, timings)
+    finally:
+        timings.finish()
+
+def answer_query(query_data: ChatRequest, timings: StageTimings):
+    """Run the stages of process_query, recording their durations in timings."""
+    user_question = query_data.query
 
+    # Start the independent stages concurrently
+    business_future = timings.submit("business_data", business_collection.find_one)
+    custom_responses_future = timings.submit("custom_responses", lambda: list(custom_responses_collection.find()))
+    chat_history_future = timings.submit("chat_history", queries_collection.find_one, {"user_id": query_data.user_id})
+    language_future = timings.start("language", translate_query_to_english, timings, user_question)
+
+    business_data = business_future.result()
     if not business_data:
         raise HTTPException(status_code=404, detail="Business information not found")
     
     current_datetime = datetime.now()
     formatted_current_date = current_datetime.strftime("%Y-%m-%d")
     formatted_current_time = current_datetime.strftime("%H:%M:%S")
-    user_question = query_data.query
 
-    # Detect query language and translate if necessary
-    detected_language = detected_que_language(user_question)
-    if detected_language != "en":
-        user_question = convert_language(user_query=user_question, current_language=detected_language, dest_language="en")
+    detected_language, user_question = language_future.result()
+    chat_history = chat_history_future.result()
+
+    # Speculatively set up the calendar and fetch busy times while the answer is generated
+    calendar_future, meetings_future = None, None
+    previous_messages = chat_history["messages"] if chat_history else []
+    if is_booking_in_progress(previous_messages):
+        calendar_future, meetings_future = prefetch_calendar_availability(timings)
 
     system_prompt = f"""
         You are the AI Receptionist for Tech Solutions company. Your role is to act as an assistant, maintaining a cheerful tone for happy queries and an apologetic tone for complaints. You are responsible for assisting users with information about services and for booking appointments.
@@ -192,37 +281,32 @@ def process_query(query_data: ChatRequest):
     # Generate custom response F-strings
     custom_responses = "\n".join(
         [f"Custom Response for {response['query_type']}: f\"{response['response_template']}\""
-         for response in custom_responses_documents]
+         for response in custom_responses_future.result()]
     )
 
     # Combine the prompts into a single system prompt
     system_prompt = f"{system_prompt}\n\n{prompt}\n{custom_responses}"
         
-    # Fetch previous chat history for the user
-    chat_history = queries_collection.find_one({"user_id": query_data.user_id})
-    
+    query_prompt = f"Use answer json for all the queries. If you confirm with the user for appointment, then respond with that JSON.\n\nUser question: {user_question}"
+    user_message = {"role": "user", "content": query_prompt}
+
     if not chat_history:
         # If no previous history exists, initialize a new chat history for the user
-        chat_history = {
-            "user_id": query_data.user_id,
-            "messages": [{"role": "system", "content": system_prompt}]  # Stores user/assistant message pairs
-        }
-        queries_collection.insert_one(chat_history)
+        new_messages = [{"role": "system", "content": system_prompt}, user_message]  # Stores user/assistant message pairs
+    else:
+        new_messages = [user_message]
 
-    query_prompt = f"Use answer json for all the queries. If you confirm with the user for appointment, then respond with that JSON.\n\nUser question: {user_question}"
-    
-    queries_collection.update_one(
-        {"user_id": query_data.user_id},
-        {"$push": {"messages": {"role": "user", "content": query_prompt}}}
+    # Store the user's message while the answer is generated
+    store_messages_future = timings.submit(
+        "store_user_message", store_user_messages, query_data.user_id, list(new_messages), not chat_history
     )
-    
-    # Fetch updated chat history
-    chat_history = queries_collection.find_one({"user_id": query_data.user_id})
-    print(chat_history["messages"])
-    print(type(chat_history["messages"]))
+
+    # Build the updated chat history locally instead of fetching it again
+    messages = previous_messages + new_messages
+    print(messages)
 
     # Generate the response using OpenAI
-    response = generate_answer(chat_history["messages"], query_prompt)
+    response = timings.run("llm", generate_answer, messages, query_prompt)
     print(response)
     response_json = json.loads(response)
 
@@ -243,18 +327,25 @@ def process_query(query_data: ChatRequest):
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to parse appointment details: {str(e)}")
 
-        # Check for existing appointment conflicts
-        existing_appointment = appointments_collection.find_one({
+        # Check for existing appointment conflicts while the calendar client is set up
+        existing_appointment_future = timings.submit("appointment_lookup", appointments_collection.find_one, {
             "appointment_date": appointment_date,
             "$or": [
                 {"start_time": {"$lte": appointment_time}, "end_time": {"$gte": appointment_time}}
             ]
         })
         
-        calendar_service = authenticate_google_calendar()
+        calendar_service = get_calendar_service(timings, calendar_future)
+        existing_appointment = existing_appointment_future.result()
 
         if existing_appointment:
-            existing_meetings = check_existing_meetings(calendar_service, appointment_date, appointment_time)
+            # Use the prefetched meetings when they cover the requested time
+            upcoming_meetings = get_prefetched_meetings(meetings_future)
+            existing_meetings = find_meetings_at(upcoming_meetings, appointment_date, appointment_time) if upcoming_meetings else None
+            if existing_meetings is None:
+                existing_meetings = timings.run(
+                    "calendar_lookup", check_existing_meetings, calendar_service, appointment_date, appointment_time
+                )
             if existing_meetings:
                 return {"answer": f"Conflict detected! Existing meeting at {appointment_date} {appointment_time}. Please choose another time."}
 
@@ -292,9 +383,12 @@ def process_query(query_data: ChatRequest):
                 "start_time": appointment_time,
                 "end_time": (datetime.strptime(appointment_time, "%H:%M:%S") + timedelta(hours=1)).strftime("%H:%M:%S")
             }
-            meeting_link = schedule_meeting(calendar_service, user_name, user_email, service_name, appointment_date, appointment_time)
+            meeting_link = timings.run(
+                "schedule_meeting", schedule_meeting,
+                calendar_service, user_name, user_email, service_name, appointment_date, appointment_time
+            )
 
-            appointments_collection.insert_one(new_appointment)
+            timings.run("appointment_insert", appointments_collection.insert_one, new_appointment)
 
             result = {
                 "query": user_question,
@@ -304,7 +398,8 @@ def process_query(query_data: ChatRequest):
             }
             answer = result['answer']
 
-    # Append the assistant's response to the chat history
+    # Append the assistant's response to the chat history once the user's message is stored
+    store_messages_future.result()
     queries_collection.update_one(
         {"user_id": query_data.user_id},
         {"$push": {"messages": {"role": "assistant", "content": answer}}}
@@ -312,7 +407,10 @@ def process_query(query_data: ChatRequest):
 
     # Translate the answer back to the user's language if needed
     if detected_language != "en":
-        answer = convert_language(user_query=answer, current_language="en", dest_language=detected_language)
+        answer = timings.run(
+            "translation_out", convert_language,
+            user_query=answer, current_language="en", dest_language=detected_language
+        )
 
     return QueryData(user_id=query_data.user_id, query=user_question, answer=answer)
 
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Shared thread pool used to run independent I/O stages of a request concurrently
+stage_workers = int(os.getenv("QUERY_STAGE_WORKERS") or 8)
+stage_executor = ThreadPoolExecutor(max_workers=stage_workers)
+
+# One slot per stage worker; stages run inline instead of queueing when no worker is free
+stage_slots = threading.BoundedSemaphore(stage_workers)
+
+# Separate, smaller pool for speculative work so it never queues ahead of other requests' stages
+speculative_workers = int(os.getenv("SPECULATIVE_STAGE_WORKERS") or 2)
+speculative_executor = ThreadPoolExecutor(max_workers=speculative_workers)
+
+# Limit queued plus running speculative stages; new speculation is skipped beyond this
+speculative_slots = threading.BoundedSemaphore(speculative_workers * 2)
+
+
+def submit_stage(func, *args, **kwargs) -> Future:
+    """
+    Run a function on the shared stage pool if a worker is free, otherwise run
+    it in the current thread, and return its future.
+
+    Running inline keeps a busy server from making a request wait behind the
+    stages of other requests, so it is never slower than running sequentially.
+    """
+    if stage_slots.acquire(blocking=False):
+        future = stage_executor.submit(func, *args, **kwargs)
+        future.add_done_callback(lambda _: stage_slots.release())
+        return future
+
+    future = Future()
+    try:
+        future.set_result(func(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+class StageTimings:
+    """
+    Record how long each stage of a request takes.
+
+    Stages can run inline with `run`, on the shared thread pool with `submit`,
+    or speculatively on the bounded speculative pool with `speculate`.
+    The report shows how long each stage waited for a worker and how long it
+    ran, and compares the wall-clock time of the request with the sum of the
+    non-speculative stage durations, which is what the request would take if
+    run sequentially. Speculative stages are listed but not counted in that sum.
+    """
+
+    def __init__(self, request_name: str):
+        self.request_name = request_name
+        self.started_at = time.perf_counter()
+        self.durations = {}
+        self.waits = {}
+        self.speculative_durations = {}
+        self.speculative_futures = []
+
+    def _timed(self, durations: dict, name: str, submitted_at: float, func, *args, **kwargs):
+        start = time.perf_counter()
+        self.waits[name] = start - submitted_at
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if durations is not None:
+                durations[name] = time.perf_counter() - start
+
+    def run(self, name: str, func, *args, **kwargs):
+        """Run a stage in the current thread and record its duration."""
+        return self._timed(self.durations, name, time.perf_counter(), func, *args, **kwargs)
+
+    def submit(self, name: str, func, *args, **kwargs):
+        """Start a stage on the shared thread pool, or inline if it is busy, and return its future."""
+        return submit_stage(self._timed, self.durations, name, time.perf_counter(), func, *args, **kwargs)
+
+    def start(self, name: str, func, *args, **kwargs):
+        """
+        Start work that records its own stages on the shared thread pool, or inline
+        if it is busy, and return its future. Only its wait for a worker is recorded.
+        """
+        return submit_stage(self._timed, None, name, time.perf_counter(), func, *args, **kwargs)
+
+    def speculate(self, name: str, func, *args, **kwargs):
+        """
+        Start a speculative stage on the speculative pool and return its future,
+        or return None if the pool is saturated.
+        """
+        if not speculative_slots.acquire(blocking=False):
+            print(f"[{self.request_name}] skipped speculative stage {name}: pool saturated")
+            return None
+
+        future = speculative_executor.submit(
+            self._timed, self.speculative_durations, name, time.perf_counter(), func, *args, **kwargs
+        )
+        future.add_done_callback(lambda _: speculative_slots.release())
+        self.speculative_futures.append(future)
+        return future
+
+    def finish(self):
+        """Cancel speculative stages that have not started yet and print the report."""
+        for future in self.speculative_futures:
+            future.cancel()
+        self.report()
+
+    def report(self):
+        """Print the wait and duration of every finished stage and the time saved by running them concurrently."""
+        wall_ms = (time.perf_counter() - self.started_at) * 1000
+        sequential_ms = sum(self.durations.values()) * 1000
+
+        print(f"[{self.request_name}] stage timings:")
+        print(f"  {'stage':<28}{'wait ms':>12}{'run ms':>12}")
+        for name, duration in list(self.durations.items()):
+            print(f"  {name:<28}{self.waits.get(name, 0) * 1000:>12.1f}{duration * 1000:>12.1f}")
+        for name, duration in list(self.speculative_durations.items()):
+            print(f"  {name + ' (speculative)':<28}{self.waits.get(name, 0) * 1000:>12.1f}{duration * 1000:>12.1f}")
+        # Work that records its own stages only reports its wait for a worker
+        for name, wait in list(self.waits.items()):
+            if name not in self.durations and name not in self.speculative_durations:
+                print(f"  {name:<28}{wait * 1000:>12.1f}")
+        print(f"  {'sequential total':<28}{'':>12}{sequential_ms:>12.1f}")
+        print(f"  {'critical path (wall)':<28}{'':>12}{wall_ms:>12.1f}")
@@ -1,9 +1,268 @@
-from deep_translator import GoogleTranslator
-from langdetect import detect
+import importlib.util
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List
+
+# Languages supported end-to-end by the receptionist
+ALLOWED_LANGUAGES = ['en', 'hi', 'gu']
+
+# Language codes used by the NLLB family of offline translation models
+NLLB_LANGUAGE_CODES = {
+    'en': 'eng_Latn',
+    'hi': 'hin_Deva',
+    'gu': 'guj_Gujr',
+}
+
+# Unicode blocks used by the local detector to recognise Hindi and Gujarati script
+DEVANAGARI_RANGE = (0x0900, 0x097F)
+GUJARATI_RANGE = (0x0A80, 0x0AFF)
+
+
+class TranslatorBackend:
+    """
+    Base interface for translation backends.
+
+    A backend must be able to detect the language of a piece of text and to
+    translate a batch of texts from one language to another.
+    """
+
+    name = "base"
+
+    def detect(self, text: str) -> str:
+        raise NotImplementedError
+
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        raise NotImplementedError
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        return self.translate_batch([text], source, target)[0]
+
+    def warm_up(self):
+        """Prepare the backend so the first request does not pay its setup cost."""
+        pass
+
+    def close(self):
+        """Release any resources held by the backend."""
+        pass
+
+
+class GoogleTranslatorBackend(TranslatorBackend):
+    """
+    Network backend using langdetect for detection and Google Translate for translation.
+    """
+
+    name = "google"
+
+    def detect(self, text: str) -> str:
+        from langdetect import detect
+        return detect(text)
+
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        from deep_translator import GoogleTranslator
+        return GoogleTranslator(source=source, target=target).translate_batch(texts)
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        from deep_translator import GoogleTranslator
+        return GoogleTranslator(source=source, target=target).translate(text)
+
+
+# Per-process state for the local translation workers
+_worker_tokenizer = None
+_worker_model = None
+
+
+def _init_local_worker(model_name: str, num_threads: int):
+    """
+    Load the offline translation model once in each worker process.
+
+    Only local files are used, so the model must be downloaded beforehand.
+    """
+    global _worker_tokenizer, _worker_model
+
+    import torch
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    # Split the CPU cores between the worker processes
+    torch.set_num_threads(num_threads)
+
+    _worker_tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=True)
+    _worker_model = AutoModelForSeq2SeqLM.from_pretrained(model_name, local_files_only=True)
+    _worker_model.eval()
+
+
+def _translate_local_chunk(texts: List[str], source: str, target: str, max_length: int) -> List[str]:
+    """
+    Translate one batch of texts inside a worker process.
+    """
+    import torch
+
+    _worker_tokenizer.src_lang = NLLB_LANGUAGE_CODES[source]
+    inputs = _worker_tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=max_length)
+
+    with torch.inference_mode():
+        outputs = _worker_model.generate(
+            **inputs,
+            forced_bos_token_id=_worker_tokenizer.convert_tokens_to_ids(NLLB_LANGUAGE_CODES[target]),
+            max_length=max_length,
+        )
+
+    return _worker_tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+
+class LocalTranslatorBackend(TranslatorBackend):
+    """
+    Offline CPU backend that translates with an NLLB model and detects language by script.
+
+    The model is loaded in a pool of worker processes so translation does not
+    hold the GIL of the API process. Texts passed to `translate_batch` are
+    translated in batches; `convert_language` sends one text per call.
+    Requires the optional `transformers`, `torch` and `sentencepiece` packages
+    and a model already present in the local Hugging Face cache or on disk.
+    """
+
+    name = "local"
+
+    def __init__(self, model_name: str = "facebook/nllb-200-distilled-600M",
+                 workers: int = 1, batch_size: int = 8, max_length: int = 512,
+                 timeout: float = 30, warm_up_timeout: float = 300):
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.max_length = max_length
+        self.timeout = timeout
+        self.warm_up_timeout = warm_up_timeout
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Start the worker processes lazily so importing this module stays cheap
+        if self._pool is None:
+            with self._pool_lock:
+                # Another request thread may have created the pool while we waited
+                if self._pool is None:
+                    num_threads = max(1, (os.cpu_count() or 1) // self.workers)
+                    # Spawn workers since forking the multi-threaded API process can deadlock the child
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_local_worker,
+                        initargs=(self.model_name, num_threads),
+                    )
+        return self._pool
+
+    def detect(self, text: str) -> str:
+        """
+        Detect Hindi or Gujarati by counting characters in their Unicode blocks.
+        A text is Hindi or Gujarati only if those characters make up more than
+        half of its letters; anything else is treated as English.
+        """
+        devanagari = 0
+        gujarati = 0
+        other_letters = 0
+        for char in text:
+            code_point = ord(char)
+            if DEVANAGARI_RANGE[0] <= code_point <= DEVANAGARI_RANGE[1]:
+                devanagari += 1
+            elif GUJARATI_RANGE[0] <= code_point <= GUJARATI_RANGE[1]:
+                gujarati += 1
+            elif char.isalpha():
+                other_letters += 1
+
+        # Vowel signs are not alphabetic, so every character of the Indic blocks is counted as a letter
+        if (devanagari + gujarati) * 2 <= devanagari + gujarati + other_letters:
+            return 'en'
+        return 'gu' if gujarati > devanagari else 'hi'
+
+    def warm_up(self):
+        """
+        Start every worker process and load the model in each one.
+
+        Workers started with spawn are created on demand, so one task is
+        submitted per worker.
+        """
+        self._translate_chunks([["Hello"]] * self.workers, 'en', 'hi', self.warm_up_timeout)
+
+    def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        if source == target or not texts:
+            return list(texts)
+
+        chunks = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        return self._translate_chunks(chunks, source, target, self.timeout)
+
+    def _translate_chunks(self, chunks: List[List[str]], source: str, target: str, timeout: float) -> List[str]:
+        pool = self._get_pool()
+        deadline = time.monotonic() + timeout
+
+        translated = []
+        try:
+            futures = [pool.submit(_translate_local_chunk, chunk, source, target, self.max_length) for chunk in chunks]
+            for future in futures:
+                translated.extend(future.result(timeout=max(0, deadline - time.monotonic())))
+        except BrokenProcessPool:
+            # A worker died, e.g. killed for memory or failing to load the model, so rebuild the pool on the next call
+            self._reset_pool(pool)
+            raise
+        return translated
+
+    def _reset_pool(self, pool: ProcessPoolExecutor):
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def close(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+
+_translator_backend = None
+_translator_backend_lock = threading.Lock()
+
+
+def create_translator_backend(backend_name: str = None) -> TranslatorBackend:
+    """
+    Create a translator backend from its name or from the TRANSLATOR_BACKEND setting.
+    """
+    backend_name = (backend_name or os.getenv("TRANSLATOR_BACKEND") or "google").lower()
+
+    if backend_name == "google":
+        return GoogleTranslatorBackend()
+    if backend_name == "local":
+        # Check the optional packages here so a bad setup fails clearly instead of inside a worker process
+        missing = [name for name in ("transformers", "torch", "sentencepiece") if importlib.util.find_spec(name) is None]
+        if missing:
+            raise ImportError(f"The local translator backend requires: {', '.join(missing)}")
+        return LocalTranslatorBackend(
+            model_name=os.getenv("LOCAL_TRANSLATOR_MODEL") or "facebook/nllb-200-distilled-600M",
+            workers=int(os.getenv("LOCAL_TRANSLATOR_WORKERS") or 1),
+            batch_size=int(os.getenv("LOCAL_TRANSLATOR_BATCH_SIZE") or 8),
+            timeout=float(os.getenv("LOCAL_TRANSLATOR_TIMEOUT") or 30),
+        )
+    raise ValueError(f"Unknown translator backend: {backend_name}")
+
+
+def get_translator_backend() -> TranslatorBackend:
+    """
+    Return the configured translator backend, creating it on first use.
+    """
+    global _translator_backend
+    if _translator_backend is None:
+        with _translator_backend_lock:
+            # Another request thread may have created the backend while we waited
+            if _translator_backend is None:
+                _translator_backend = create_translator_backend()
+    return _translator_backend
+
 
 def detected_que_language(user_query: str) -> str:
-    # Detect the language using langdetect
-    detected_language = detect(user_query)
+    # Detect the language using the configured backend
+    detected_language = get_translator_backend().detect(user_query)
     print(f"Detected language: {detected_language}")
     return detected_language
 
@@ -12,18 +271,15 @@ def convert_language(user_query: str, current_language: str, dest_language: str)
     Convert the user's query from the detected language to the target language.
     If the current or destination language is not English, Hindi, or Gujarati, it defaults to English.
     """
-    # Define allowed languages
-    allowed_languages = ['en', 'hi', 'gu']
-
     # If current_language is not in allowed languages, set it to English
-    if current_language not in allowed_languages:
+    if current_language not in ALLOWED_LANGUAGES:
         current_language = 'en'
 
     # If dest_language is not in allowed languages, set it to English
-    if dest_language not in allowed_languages:
+    if dest_language not in ALLOWED_LANGUAGES:
         dest_language = 'en'
 
-    # Translate the query using Google Translator
-    translated_query = GoogleTranslator(source=current_language, target=dest_language).translate(user_query)
+    # Translate the query using the configured backend
+    translated_query = get_translator_backend().translate(user_query, current_language, dest_language)
     print(f"Translated query to {dest_language}: {translated_query}")
-    return translated_query
\ No newline at end of file
+    return translated_query